@@ -40,7 +40,7 @@ class Button:
         """ Check if the button is pressed or not - useful if polling """
         
         status = (self._lowActive and self._pin.value() ==0) or (not self._lowActive and self._pin.value() == 1)
-        Log.i(f'Button {self._name} isPressed: {status}')
+        Log.i('Button %s isPressed: %s', self._name, status)
         return status
     
     def setHandler(self, handler):
@@ -68,10 +68,10 @@ class Button:
             self._lastStatus = v
             if self._handler is not None:
                 if self.isPressed():
-                    Log.i(f'Button {self._name} pressed')
+                    Log.i('Button %s pressed', self._name)
                     self._handler.buttonPressed(self._name)
                 else:
-                    Log.i(f'Button {self._name} released')
+                    Log.i('Button %s released', self._name)
                     self._handler.buttonReleased(self._name)
         #self._debounce_time=t
 
@@ -75,13 +75,22 @@ class PassiveBuzzer(Buzzer):
         self._buz = PWM(Pin(pin))
         self._volume = 0.5  # Default volume is half
         self._playing = False
+        self._tone = None   # Last frequency programmed into the PWM
         self.stop()
 
     def play(self, tone=500):
-        """ play the supplied tone. """
+        """
+        play the supplied tone. The PWM is only reprogrammed when the tone
+        or the playing state changes, so calling play with the same tone
+        on every tick of a state loop is cheap.
+        """
         
+        if self._playing and tone == self._tone:
+            return
         Log.i(f"{self._name}: playing tone {tone}")
-        self._buz.freq(tone)
+        if tone != self._tone:
+            self._buz.freq(tone)
+            self._tone = tone
         self._buz.duty_u16(int(self._volume * self.MAX))
         self._playing = True
 
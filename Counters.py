@@ -146,6 +146,11 @@ class BaseTimer(Counter):
         self._count = seconds
         self._started = True
 
+    def start_ms(self, ms):
+        """ Start the timer with a whole number of milliseconds """
+        
+        self.start(ms / 1000)
+
     def cancel(self):
         self._started = False
         self._count = 0
@@ -176,8 +181,13 @@ class HardwareTimer(BaseTimer):
     def start(self, seconds):
         """ Start the timer with the number of seconds to use. """
         
-        super().start(seconds)
-        self._timer.init(period = int(seconds*1000), mode=Timer.ONE_SHOT, callback = self.timeout)
+        self.start_ms(int(seconds*1000))
+
+    def start_ms(self, ms):
+        """ Start the timer with a whole number of milliseconds. """
+        
+        BaseTimer.start(self, ms / 1000)
+        self._timer.init(period = ms, mode=Timer.ONE_SHOT, callback = self.timeout)
 
     def cancel(self):
         """ Cancel the timer. Note that a normal stop will cause the handler callback. """
@@ -201,13 +211,23 @@ class SoftwareTimer(BaseTimer):
     def __init__(self, name='Software Timer', handler=None):
         super().__init__(name, handler)
         self._starttime = 0
+        self._duration_ms = 0
         self._started = False
 
     def start(self, seconds):
         """ Start the timer with a set number of seconds """
         
-        Log.i(f"Starting timer with {seconds} seconds")
-        self._count = seconds
+        self.start_ms(int(seconds * 1000))
+
+    def start_ms(self, ms):
+        """
+        Start the timer with a whole number of milliseconds. The deadline is
+        kept in integer ticks so check() needs no float math.
+        """
+        
+        Log.i(f"Starting timer with {ms} ms")
+        self._count = ms / 1000
+        self._duration_ms = ms
         self._starttime = time.ticks_ms()
         self._started = True
 
@@ -224,7 +244,7 @@ class SoftwareTimer(BaseTimer):
         Periodically call the check method - can be called from anywhere
         """
         
-        if self._started and time.ticks_diff(time.ticks_ms(), self._starttime) > self._count * 1000:
+        if self._started and time.ticks_diff(time.ticks_ms(), self._starttime) > self._duration_ms:
             Log.i(f"{self._name}: {self._count} sec timer is up")
             self._started = False
             self._count = 0
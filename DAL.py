@@ -1,27 +1,192 @@
 # DAL.py – Data Access Layer for Smart Parking (Oracle APEX)
 
-from Net import Net
-from Log import *
+import json
+import random
+from time import ticks_ms, ticks_diff, ticks_add, sleep_ms
+
+from Net import Net, Session
+from Log import Log
 
 # Base URL for your parking REST module in Oracle APEX
-BASEURL = "https://oracleapex.com/ords/jarias32/parking/"
+APEX_HOST = "oracleapex.com"
+BASEURL = f"https://{APEX_HOST}/ords/jarias32/parking/"
 
 # Individual endpoints
 GARAGES_URL = f"{BASEURL}garages"
 LEVELS_URL  = f"{BASEURL}levels"
 EVENTS_URL  = f"{BASEURL}events"   # POST here with level_id + sensor_type
+EVENTS_BATCH_URL = f"{BASEURL}events/batch"   # POST a JSON array of events here
+
+# Sensor types accepted by APEX
+ENTRY = "entry"
+EXIT = "exit"
+_VALID_SENSOR_TYPES = frozenset((ENTRY, EXIT))
+
+# Queued events waiting for the next flush_events (oldest dropped when full)
+EVENT_QUEUE_SIZE = 64
+
+# Repeats of the same (level_id, sensor_type) within this window are folded
+# into one queued event with a count instead of being queued separately
+COALESCE_WINDOW_MS = 1000
+
+# Events are held back this long before being sent, so one recorded late
+# (e.g. an IRQ racing the model loop) can still be put in time order. The
+# hold time doubles, up to the max, whenever an event arrives too late anyway.
+REORDER_LATENCY_MS = 200
+REORDER_LATENCY_MAX_MS = 2000
+
+# Circuit breaker: after a failed POST (network error or 5xx) no further
+# POSTs are attempted until a backoff period has passed - so a dead link
+# costs one timeout per period rather than one per event. The period
+# doubles on every consecutive failure up to the max
+FLUSH_BACKOFF_MS = 500
+FLUSH_BACKOFF_MAX_MS = 30000
+
+# Up to this many random ms are added to every backoff/retry delay, so
+# devices that lost the network together do not all retry in lock-step
+BACKOFF_JITTER_BITS = 7   # 0-127 ms
+
+# send_sensor_event retries opening the APEX connection this many times.
+# The POST itself is never repeated once it may have reached APEX, since
+# that could record the event twice
+SEND_ATTEMPTS = 3
+SEND_RETRY_BASE_MS = 200
+
+# Room left after the headers in the single-event request buffer
+EVENT_BODY_MAX = 64
+
+# GET results are reused without asking APEX for this long; after that
+# they are revalidated with a conditional GET (If-None-Match / 304)
+CACHE_TTL_MS = 5 * 60 * 1000
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Event bodies are filled in directly rather than built as dicts and run
+# through json.dumps - same JSON on the wire, a fraction of the work.
+# A single event, {"level_id":101,"sensor_type":"entry"}, is written piece
+# by piece into a reusable buffer (see _event_request)
+EVENT_JSON_PARTS = (b'{"level_id":', b',"sensor_type":"', b'"}')
+_SENSOR_TYPE_BYTES = {ENTRY: b"entry", EXIT: b"exit"}
+# first_ts/last_ts are the Pico's ticks_ms(), which restart at every boot
+# and wrap around - they order events, they do not identify them
+BATCH_EVENT_JSON = '{"level_id":%d,"sensor_type":"%s","count":%d,"first_ts":%d,"last_ts":%d}'
+
+
+def _retryable(status):
+    """
+    True for answers that say "not now" rather than "never": 5xx, 408
+    Request Timeout and 429 Too Many Requests. Events sent with those are
+    kept for a later try - any other 4xx is a bad request and is dropped.
+    """
+    return status >= 500 or status == 408 or status == 429
+
+
+def _put(buf, pos, data):
+    """ Copy data into buf at pos, returns the position after it """
+    end = pos + len(data)
+    buf[pos:end] = data
+    return end
+
+
+def _int_len(n):
+    """ Number of characters in the decimal form of n """
+    length = 1 if n >= 0 else 2
+    n = abs(n)
+    while n >= 10:
+        n //= 10
+        length += 1
+    return length
+
+
+def _put_int(buf, pos, n):
+    """ Write n in decimal into buf at pos, returns the position after it """
+    if n < 0:
+        buf[pos] = 0x2D  # '-'
+        pos += 1
+        n = -n
+    end = pos + _int_len(n)
+    i = end
+    while True:
+        i -= 1
+        buf[i] = 0x30 + n % 10
+        n //= 10
+        if n == 0:
+            break
+    return end
 
 
 class DAL:
     """
     Minimal DAL for the Smart Parking project.
     - send_sensor_event: POST raw sensor events to /parking/events
-    - get_garages / get_levels: optional helpers for debugging/inspection
+    - enqueue_sensor_event / flush_events: queue events and POST them
+      together to /parking/events/batch
+    - get_garages / get_levels / get_garages_and_levels: optional helpers
+      for debugging/inspection
+
+    All requests share one keep-alive Session, so only the first call
+    pays for the TLS handshake with APEX. Call close() when done.
     """
 
+    # Fixed attribute layout - no per-instance __dict__ where supported
+    __slots__ = ('_net', '_session', '_events_head', '_batch_head',
+                 '_event_head_end', '_event_buf', '_event_len_at', '_events',
+                 '_max_latency_ms', '_last_sent_ts', '_coalesce', '_backoff_ms',
+                 '_retry_at', '_batch_supported', '_cache')
+
     def __init__(self, net: Net | None = None):
-        # Reuse an existing Net instance if provided, otherwise create our own
-        self._net = net if net is not None else Net()
+        # Use the given Net instance, otherwise the shared default one
+        self._net = net if net is not None else Net.default()
+        # One pooled connection to APEX, reused by every request below and
+        # shared with anything else using the same Net
+        self._session = self._net.session(APEX_HOST)
+        # Request headers for the event POSTs never change - encode them once
+        self._events_head = self._session.header("POST", Session.path(EVENTS_URL), JSON_HEADERS)
+        self._batch_head = self._session.header("POST", Session.path(EVENTS_BATCH_URL), JSON_HEADERS)
+        # Single-event POSTs (headers + body) are written into this buffer
+        # in place, so sending one allocates no strings. The headers up to
+        # the Content-Length value never change and are copied in once
+        head_start, self._event_head_end = self._events_head.split(b"%d")
+        self._event_buf = bytearray(len(self._events_head) + EVENT_BODY_MAX)
+        self._event_buf[:len(head_start)] = head_start
+        self._event_len_at = len(head_start)
+
+        # Sensor events waiting to be flushed, oldest first_ts first, each
+        # a list of [level_id, sensor_type, count, first_ts, last_ts]
+        self._events = []
+        self._max_latency_ms = REORDER_LATENCY_MS
+        self._last_sent_ts = None
+        # (level_id, sensor_type) -> queued event that repeats can fold into
+        self._coalesce = {}
+        # Circuit breaker state - see _circuit_open
+        self._backoff_ms = 0
+        self._retry_at = 0
+        # Switched off if APEX has no batch endpoint - we then POST one by one
+        self._batch_supported = True
+
+        # url -> (etag, data, fetched_at) for the GET helpers
+        self._cache = {}
+
+    def connect(self):
+        """
+        Open the pooled APEX connection ahead of the first request. It stays
+        open (keep-alive) for every request after that, and is reopened
+        automatically if APEX drops it. Returns False if it can't be opened
+        right now - requests will then try again on their own.
+        """
+        try:
+            self._session.connect()
+            return True
+        except OSError as e:
+            Log.e("DAL: could not connect to APEX: %s", e)
+            return False
+
+    def close(self):
+        """
+        Close the pooled APEX connection. It is reopened if anything
+        sharing it makes another request.
+        """
+        self._session.close()
 
     # ------------------------------------------------------------------
     # POST /parking/events
@@ -31,22 +196,249 @@ class DAL:
         Send a single sensor event to the Oracle APEX backend.
 
         level_id: numeric level id (1, 2, ...)
-        sensor_type: "entry" or "exit"
+        sensor_type: ENTRY ("entry") or EXIT ("exit")
         """
 
-        if sensor_type not in ("entry", "exit"):
+        if sensor_type not in _VALID_SENSOR_TYPES:
             raise ValueError("sensor_type must be 'entry' or 'exit'")
 
-        payload = {
-            "level_id": level_id,
-            "sensor_type": sensor_type,
-        }
+        if self._circuit_open(ticks_ms()):
+            Log.e("DAL: APEX unreachable, not sending event for level %d", level_id)
+            return None
 
-        Log.i(f"DAL: POST {EVENTS_URL} payload={payload}")
-        data = self._net.postJson(EVENTS_URL, payload)
-        Log.i(f"DAL: send_sensor_event response = {data}")
+        Log.i("DAL: POST %s level_id=%d sensor_type=%s", EVENTS_URL, level_id, sensor_type)
+        data = None
+        try:
+            status, resp = self._post_with_retry(self._event_request(level_id, sensor_type))
+        except Exception as e:
+            Log.e("DAL: send_sensor_event failed: %s", e)
+            self._trip_circuit(ticks_ms())
+            return None
+        if _retryable(status):
+            self._trip_circuit(ticks_ms())
+        else:
+            self._backoff_ms = 0
+            # APEX has answered - a body that is not JSON (e.g. an HTML
+            # error page or plain text) must not count as a failed send
+            try:
+                data = json.loads(resp) if resp else None
+            except ValueError:
+                Log.e("DAL: non-JSON response to event POST: %s", resp)
+        Log.i("DAL: send_sensor_event response = %s", data)
         return data
 
+    def _post_with_retry(self, request, attempts=SEND_ATTEMPTS, base_ms=SEND_RETRY_BASE_MS):
+        """
+        _send, after opening the connection to APEX if needed - that is
+        retried on network errors with a jittered exponential delay in
+        between. The request itself is sent once: after a 5xx or an error
+        mid-request APEX may already have recorded it.
+        This blocks, so it is only for callers that wait for the answer
+        anyway - queued events back off in flush_events.
+        """
+        for i in range(attempts):
+            try:
+                self._session.connect()
+                break
+            except OSError:
+                if i == attempts - 1:
+                    raise
+            sleep_ms(base_ms * (1 << i) + random.getrandbits(BACKOFF_JITTER_BITS))
+        return self._send(request)
+
+    # ------------------------------------------------------------------
+    # Batched POST /parking/events/batch
+    # ------------------------------------------------------------------
+    def enqueue_sensor_event(self, level_id: int, sensor_type: str, ts=None):
+        """
+        Queue a sensor event to be sent by a later flush_events call.
+        Returns immediately - no network I/O is done here.
+
+        ts: ticks_ms() when the event actually happened, if known.
+            Defaults to now. The queue is kept in ts order.
+        """
+
+        if sensor_type not in _VALID_SENSOR_TYPES:
+            raise ValueError("sensor_type must be 'entry' or 'exit'")
+
+        if ts is None:
+            ts = ticks_ms()
+
+        if self._last_sent_ts is not None and ticks_diff(ts, self._last_sent_ts) < 0:
+            # Older than something already sent - wait longer from now on
+            self._max_latency_ms = min(self._max_latency_ms * 2, REORDER_LATENCY_MAX_MS)
+            Log.e("DAL: late event, reorder window now %d ms", self._max_latency_ms)
+
+        key = (level_id, sensor_type)
+        event = self._coalesce.get(key)
+        if event is not None and 0 <= ticks_diff(ts, event[3]) < COALESCE_WINDOW_MS:
+            event[2] += 1
+            if ticks_diff(ts, event[4]) > 0:
+                event[4] = ts
+            return
+
+        if len(self._events) >= EVENT_QUEUE_SIZE:
+            dropped = self._events.pop(0)
+            Log.e("DAL: event queue full, dropping oldest event %s", dropped)
+            # Repeats must not fold into an event that will never be sent
+            dropped_key = (dropped[0], dropped[1])
+            if self._coalesce.get(dropped_key) is dropped:
+                del self._coalesce[dropped_key]
+        event = [level_id, sensor_type, 1, ts, ts]
+        # Sorted insert - events nearly always arrive in order, so this
+        # rarely has to look further back than the last entry
+        i = len(self._events)
+        while i > 0 and ticks_diff(self._events[i - 1][3], ts) > 0:
+            i -= 1
+        self._events.insert(i, event)
+        self._coalesce[key] = event
+
+    def flush_events(self, max_events=None, drain=False):
+        """
+        POST the queued events to APEX in a single request - the oldest
+        max_events of them if given, otherwise all of them. Bounding the
+        batch bounds how long one flush can keep the caller waiting.
+
+        Events younger than the reorder window are held back for a later
+        flush, unless drain is True (e.g. when shutting down).
+
+        Events are removed from the queue once APEX has answered for them.
+        On a network error, a 5xx, 408 or 429 they stay queued, and further
+        flushes are skipped for an exponentially growing backoff period.
+        Delivery is at-least-once: if APEX stored a batch but the answer
+        was lost (e.g. a timeout), the batch is sent again and its events
+        are recorded twice. Nothing sent lets APEX tell a resend apart.
+        Returns the number of events taken off the queue.
+        """
+
+        if not self._events:
+            return 0
+
+        now = ticks_ms()
+        if self._circuit_open(now):
+            return 0
+
+        batch = self._events[:max_events] if max_events else self._events[:]
+        if not drain:
+            ready = 0
+            for event in batch:
+                if ticks_diff(now, event[3]) < self._max_latency_ms:
+                    break
+                ready += 1
+            if ready == 0:
+                return 0
+            batch = batch[:ready]
+        # Events being sent must not change under us - new repeats start fresh
+        for event in batch:
+            key = (event[0], event[1])
+            if self._coalesce.get(key) is event:
+                del self._coalesce[key]
+        done = 0
+        try:
+            if self._batch_supported:
+                status, resp = self._post_batch(batch)
+                if status in (404, 405):
+                    Log.e("DAL: APEX has no batch endpoint, sending events one by one")
+                    self._batch_supported = False
+                elif not _retryable(status):
+                    # A 4xx means the request itself is bad - retrying
+                    # would fail the same way, so those events are dropped
+                    if status >= 400:
+                        Log.e("DAL: APEX rejected %d events with status %d", len(batch), status)
+                    done = len(batch)
+            if not self._batch_supported:
+                # All the POSTs still share the one pooled connection. The
+                # single-event endpoint has no count, so repeats are sent
+                # one at a time - the count drops as each one gets through
+                for event in batch:
+                    while event[2] > 0:
+                        status, resp = self._send(self._event_request(event[0], event[1]))
+                        if _retryable(status):
+                            break
+                        if status >= 400:
+                            Log.e("DAL: APEX rejected event for level %d with status %d", event[0], status)
+                        event[2] -= 1
+                    if event[2] > 0:
+                        break
+                    done += 1
+        except Exception as e:
+            Log.e("DAL: flush_events failed: %s", e)
+
+        if done:
+            self._last_sent_ts = batch[done - 1][3]
+            # Remove exactly the events that were sent - not by position, as
+            # enqueue_sensor_event may have run during the POST (sensor
+            # callbacks when flushing from stateDo) and shifted the queue
+            sent = {id(event) for event in batch[:done]}
+            self._events = [event for event in self._events if id(event) not in sent]
+        if done == len(batch):
+            self._backoff_ms = 0
+            return done
+
+        self._trip_circuit(now)
+        Log.e("DAL: keeping %d events, retrying in %d ms", len(self._events), self._backoff_ms)
+        return done
+
+    def _circuit_open(self, now):
+        """
+        True while POSTs are being skipped after a failure.
+        """
+        return ticks_diff(now, self._retry_at) < 0
+
+    def _trip_circuit(self, now):
+        """
+        A POST failed - skip POSTs for the next (longer) backoff period.
+        Any successful POST resets the backoff to zero.
+        """
+        self._backoff_ms = min(max(self._backoff_ms * 2, FLUSH_BACKOFF_MS), FLUSH_BACKOFF_MAX_MS)
+        self._retry_at = ticks_add(now, self._backoff_ms + random.getrandbits(BACKOFF_JITTER_BITS))
+
+    def pending_count(self):
+        """
+        Number of events still waiting to be sent.
+        """
+        return sum(event[2] for event in self._events)
+
+    def _post_batch(self, batch):
+        body = "[" + ",".join([BATCH_EVENT_JSON % tuple(event) for event in batch]) + "]"
+        Log.i("DAL: POST %s (%d events)", EVENTS_BATCH_URL, len(batch))
+        return self._post(self._batch_head, body.encode())
+
+    def _post(self, head, body):
+        """
+        POST an already encoded JSON body using one of the prebuilt header
+        templates. Returns (status, response body).
+        """
+        return self._send(head % len(body) + body)
+
+    def _send(self, request):
+        """
+        Send a complete, encoded POST request. Returns (status, response body).
+        """
+        status, headers, resp = self._session.send("POST", request)
+        Log.d("DAL: POST -> %s", status)
+        return status, resp
+
+    def _event_request(self, level_id, sensor_type):
+        """
+        Write the POST /events request for one event into the reusable
+        buffer and return a view of it. The view is only valid until the
+        next call.
+        """
+        start, middle, end = EVENT_JSON_PARTS
+        kind = _SENSOR_TYPE_BYTES[sensor_type]
+        body_len = len(start) + _int_len(level_id) + len(middle) + len(kind) + len(end)
+
+        buf = self._event_buf
+        pos = _put_int(buf, self._event_len_at, body_len)
+        pos = _put(buf, pos, self._event_head_end)
+        pos = _put(buf, pos, start)
+        pos = _put_int(buf, pos, level_id)
+        pos = _put(buf, pos, middle)
+        pos = _put(buf, pos, kind)
+        pos = _put(buf, pos, end)
+        return memoryview(buf)[:pos]
+
     # ------------------------------------------------------------------
     # Optional helpers (GET) – useful for quick tests from the Pico
     # ------------------------------------------------------------------
@@ -55,9 +447,9 @@ class DAL:
         GET /parking/garages
         Returns the list of garages from APEX.
         """
-        Log.i(f"DAL: GET {GARAGES_URL}")
-        data = self._net.getJson(GARAGES_URL)
-        Log.i(f"DAL: get_garages response = {data}")
+        Log.i("DAL: GET %s", GARAGES_URL)
+        data = self._get_cached(GARAGES_URL)
+        Log.i("DAL: get_garages response = %s", data)
         return data
 
     def get_levels(self):
@@ -65,7 +457,78 @@ class DAL:
         GET /parking/levels
         Returns the list of levels from APEX.
         """
-        Log.i(f"DAL: GET {LEVELS_URL}")
-        data = self._net.getJson(LEVELS_URL)
-        Log.i(f"DAL: get_levels response = {data}")
+        Log.i("DAL: GET %s", LEVELS_URL)
+        data = self._get_cached(LEVELS_URL)
+        Log.i("DAL: get_levels response = %s", data)
         return data
+
+    def get_garages_and_levels(self):
+        """
+        GET /parking/garages and /parking/levels together. Both requests
+        are written before either response is read, so the pair costs one
+        round trip to APEX rather than two.
+        Returns a tuple (garages, levels).
+        """
+        Log.i("DAL: GET %s + %s", GARAGES_URL, LEVELS_URL)
+        garages, levels = self._get_cached_many((GARAGES_URL, LEVELS_URL))
+        Log.i("DAL: get_garages_and_levels response = %s, %s", garages, levels)
+        return garages, levels
+
+    def _get_cached(self, url):
+        """
+        GET url through the cache. Fresh entries are returned without any
+        network I/O, stale ones are revalidated with their ETag.
+        """
+        return self._get_cached_many((url,))[0]
+
+    def _get_cached_many(self, urls):
+        """
+        _get_cached for several urls at once - the ones that need
+        revalidating are pipelined over the session. Returns the data for
+        each url in order. If a url can't be revalidated its stale cached
+        copy is returned, or None if it was never fetched.
+        """
+        now = ticks_ms()
+        results = [None] * len(urls)
+        stale = []
+        for i, url in enumerate(urls):
+            etag, data, fetched_at = self._cache.get(url, (None, None, 0))
+            results[i] = data
+            if data is None or ticks_diff(now, fetched_at) >= CACHE_TTL_MS:
+                stale.append(i)
+        if not stale:
+            return results
+
+        requests = []
+        for i in stale:
+            etag = self._cache.get(urls[i], (None,))[0]
+            requests.append(("GET", Session.path(urls[i]), {"If-None-Match": etag} if etag else None))
+        try:
+            responses = self._session.pipeline(requests)
+        except Exception as e:
+            Log.e("DAL: GET failed: %s", e)
+            responses = ()
+
+        failed = set(stale)
+        for i, (status, headers, body) in zip(stale, responses):
+            url = urls[i]
+            if status == 304:
+                etag, data, _ = self._cache[url]
+                self._cache[url] = (etag, data, now)
+                failed.discard(i)
+            elif status == 200:
+                try:
+                    data = json.loads(body)
+                except ValueError as e:
+                    Log.e("DAL: bad JSON from %s: %s", url, e)
+                    continue
+                self._cache[url] = (headers.get("etag"), data, now)
+                results[i] = data
+                failed.discard(i)
+            else:
+                Log.e("DAL: GET %s returned %d", url, status)
+
+        for i in failed:
+            if results[i] is not None:
+                Log.e("DAL: could not revalidate %s, using stale copy", urls[i])
+        return results
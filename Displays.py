@@ -150,13 +150,15 @@ class LCDDisplay(Display):
         """
         Show a string - only first 4 characters will be shown
         for anything bigger than 4 characters.
+        A bytearray can be passed instead, e.g. a row buffer that is
+        updated in place.
         """
         
         if self._working:
             Log.e("LCDDisplay - Display busy")
             return
         self._working = True
-        Log.i(f"LCDDisplay - showing text {text} at {row},{col}")
+        Log.i("LCDDisplay - showing text %s at %d,%d", text, row, col)
         self._lcd.move_to(col, row)
         self._lcd.putstr(text)
         self._working = False
@@ -33,6 +33,9 @@ class LightStrip(Light):
         self._numleds = numleds
         self._brightness = brightness
         self._running = False
+        self._flashTimer = None
+        self._flashFrames = None
+        self._flashIndex = 0
         
         Log.i(f'Creating a neopixel {name} on pin {pin} with {numleds} LEDs')
         self._np = neopixel.NeoPixel(machine.Pin(pin), numleds)
@@ -47,6 +50,7 @@ class LightStrip(Light):
     def off(self):
         """ Turn all LEDs OFF - all black """
         
+        self.stopFlash()
         self._running = False
         time.sleep(0.1)
         self._clear()
@@ -69,8 +73,10 @@ class LightStrip(Light):
         Sending a negative value will turn on LEDs from the end. This
         will allow a circular strip to animate from both directions.
         
+        Stops any flashing started with flash().
         """
         
+        self.stopFlash()
         if numPixels == None or numPixels < (-1 * self._numleds) or numPixels > self._numleds:
             numPixels = self._numleds
             
@@ -86,7 +92,7 @@ class LightStrip(Light):
             for i in range(0,self._numleds-np):
                 self._set_pixel(i, BLACK)
         self._np.write()
-        Log.i(f'{self._name} set color to {color}')
+        Log.i('%s set color to %s', self._name, color)
 
     def setPixel(self, pixelno, color, show=True):
         """
@@ -99,7 +105,7 @@ class LightStrip(Light):
         self._set_pixel(pixelno, color)
         if show:
             self._np.write()
-        Log.i(f'{self._name} set pixel {pixelno} to color {color}')
+        Log.i('%s set pixel %d to color %s', self._name, pixelno, color)
 
     def show(self):
         """
@@ -126,6 +132,37 @@ class LightStrip(Light):
         self._brightness = brightness
         Log.i(f'{self._name} set brightness to {brightness}')
         
+    def flash(self, color, altColor=BLACK, period_ms=500):
+        """
+        Keep all LEDs alternating between color and altColor every period_ms
+        until stopFlash (or setColor / off) is called. Both frames are
+        computed once up front, and a timer swaps them in the background,
+        so the caller does not have to poll anything to keep it going.
+        """
+        
+        self.stopFlash()
+        frames = []
+        for c in (color, altColor):
+            for i in range(self._numleds):
+                self._set_pixel(i, c)
+            frames.append(bytes(self._np.buf))
+        self._flashFrames = frames
+        self._flashIndex = 0
+        self._np.buf[:] = frames[0]
+        self._np.write()
+        self._flashTimer = machine.Timer(-1)
+        self._flashTimer.init(period=period_ms, mode=machine.Timer.PERIODIC, callback=self._flashTick)
+        Log.i(f'{self._name} flashing {color}/{altColor} every {period_ms} ms')
+
+    def stopFlash(self):
+        """ Stop flashing - the LEDs keep whatever frame they show last """
+        
+        if self._flashTimer is not None:
+            self._flashTimer.deinit()
+            self._flashTimer = None
+            self._flashFrames = None
+            Log.i(f'{self._name} flashing stopped')
+
     def run(self, runtype=0):
         """ Run a single cycle of FILLS, CHASES or RAINBOW """
         
@@ -150,6 +187,14 @@ class LightStrip(Light):
 
 
     ################# Internal functions should not be used outside here #################
+    def _flashTick(self, timer):
+        frames = self._flashFrames
+        if frames is None:
+            return
+        self._flashIndex ^= 1
+        self._np.buf[:] = frames[self._flashIndex]
+        self._np.write()
+
     def _set_pixel(self, p, color):
         modifiedcolor = tuple(int(col*self._brightness) for col in color)
         self._np[p] = modifiedcolor
@@ -12,6 +12,10 @@ Log.i(f'help')     # Info message: f-strings recommended for showing variables
 Log.d(f'value: {v}') # Debug message
 Log.e(f'Exception: {x}') # Error message
 Log.name('Myproject') # Set a global project name
+
+# On hot paths, pass a %-format string and its arguments instead of an
+# f-string. The message is then only built if it is actually shown:
+Log.d('value: %s', v)
 """
 
 """ Debug levels """
@@ -28,19 +32,19 @@ class Log:
     level = ALL
 
     @classmethod
-    def i(cls, message):
+    def i(cls, message, *args):
         if (cls.level >= INFO):
-            Log.pr(message)
+            Log.pr(message % args if args else message)
 
     @classmethod
-    def d(cls, message):
+    def d(cls, message, *args):
         if (cls.level >= DEBUG):
-            Log.pr(message)
+            Log.pr(message % args if args else message)
 
     @classmethod
-    def e(cls, message):
+    def e(cls, message, *args):
         if (cls.level >= ERROR):
-            Log.pr(message)
+            Log.pr(message % args if args else message)
 
     @classmethod
     def pr(cls, message):
@@ -60,5 +64,6 @@ if __name__ == '__main__':
     Log.level = ERROR
     Log.i(f'This should NOT print (level: {Log.level})')
     Log.e(f'This should print (level: {Log.level})')
+    Log.i('This should NOT print either (level: %d)', Log.level)
     
 
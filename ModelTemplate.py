@@ -7,7 +7,6 @@ event-based transitions.
 # Import whatever Library classes you need - StateModel is obviously needed
 # Counters imported for Timer functionality, Button imported for button events
 import time
-import random
 from Log import *
 from StateModel import *
 from Counters import *
@@ -14,9 +14,25 @@ import network
 import urequests as requests
 import ubinascii
 import json
+import socket
+import ssl
+import errno
 from Log import *
 
 class Net:
+
+    _singleton = None
+
+    @classmethod
+    def default(cls):
+        """
+        The shared Net instance, created on first use. Pass this to anything
+        that talks to the network so they all share one set of connections.
+        """
+
+        if cls._singleton is None:
+            cls._singleton = cls()
+        return cls._singleton
     
     def __init__(self):
         """
@@ -29,6 +45,7 @@ class Net:
         self._sta = None
         self._ap = None
         self._blink = False
+        self._sessions = {}
         
     def connect(self, ssid, password=None, max_wait=10):
         """
@@ -222,15 +239,32 @@ class Net:
         else:
             return f'{mm:02}/{dd:02}/{yy:04} {h:02}{col}{m:02}'
 
-    def getJson(self, url):
+    def session(self, host, port=443):
+        """
+        Get the keep-alive Session for host, creating it on first use.
+        Everyone asking this Net for the same host shares one connection.
+        """
+
+        key = (host, port)
+        if key not in self._sessions:
+            self._sessions[key] = Session(host, port)
+        return self._sessions[key]
+
+    def getJson(self, url, session=None):
         """
         Get the JSON data from a REST API. Only valid JSON supported.
         Only GET for now. No POST or PUT. Returns the parsed json structure
+
+        Pass a Session for the url's host to reuse its open connection
+        instead of opening a new one for this request.
         """
         
         try:
             if self._sta == None:
                 self.connect()
+            if session is not None:
+                status, headers, body = session.request("GET", Session.path(url))
+                return json.loads(body)
             data=requests.get(url)
             jsondata = data.json()
             data.close()
@@ -256,18 +290,22 @@ class Net:
         try:
             response = requests.put(url, data=json.dumps(data), headers=headers)
             status = response.status_code
-            Log.d(f"Status Code:{status}")
-            Log.d(f"Response:{response.text}")
+            Log.d("Status Code:%s", status)
+            if Log.level >= DEBUG:
+                Log.d("Response:%s", response.text)
             response.close()
             return status
         except Exception as e:
             Log.e(f"Failed to send request: {e}")
             return None
         
-    def postJson(self, url, data):
+    def postJson(self, url, data, session=None):
         """
         Send a HTTP POST with a JSON body.
         Configure web service to accept JSON and create new entries.
+
+        Pass a Session for the url's host to reuse its open connection
+        instead of opening a new one for this request.
         """
 
         headers = {
@@ -275,6 +313,13 @@ class Net:
         }
 
         try:
+            if session is not None:
+                body = json.dumps(data).encode() if data else None
+                status, rheaders, rbody = session.request("POST", Session.path(url), body, headers)
+                Log.d("Status Code:%s", status)
+                Log.d("Response:%s", rbody)
+                return json.loads(rbody)
+
             if data:
                 response = requests.post(url, data=json.dumps(data), headers=headers, timeout=10)
 
@@ -283,8 +328,9 @@ class Net:
 
             jsondata = response.json()
             status = response.status_code
-            Log.d(f"Status Code:{status}")
-            Log.d(f"Response:{response.text}")
+            Log.d("Status Code:%s", status)
+            if Log.level >= DEBUG:
+                Log.d("Response:%s", response.text)
             response.close()
             return jsondata
 
@@ -292,6 +338,226 @@ class Net:
             Log.e(f"Failed to send request: {e}")
             return None
 
+class ConnectionDropped(OSError):
+    """ The server closed the connection without sending any response """
+    pass
+
+class Session:
+    """
+    A minimal keep-alive HTTP/1.1 client bound to a single host.
+
+    urequests opens a brand new socket (and does a full TLS handshake) for
+    every request, which is by far the slowest part of talking to a REST
+    service from the Pico. A Session keeps one connection open and reuses it
+    for every request to its host. If the server has dropped an idle
+    connection, the request is transparently retried once on a new one.
+
+    Usage:
+        session = Session("oracleapex.com")
+        status, headers, body = session.request("GET", "/ords/...")
+        session.close()
+    """
+
+    __slots__ = ('_host', '_port', '_timeout', '_sock')
+
+    def __init__(self, host, port=443, timeout=10):
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._sock = None
+
+    @staticmethod
+    def path(url):
+        """ Return the path part of a full url, e.g. https://host/a/b -> /a/b """
+
+        parts = url.split("/", 3)
+        return "/" + parts[3] if len(parts) > 3 else "/"
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Send a request over the pooled connection.
+        body should be bytes (or None). Returns a tuple (status, headers, body)
+        with the header names in lowercase and the body as bytes.
+        """
+
+        if body is not None:
+            head = self.header(method, path, headers) % len(body)
+        else:
+            head = (self._head(method, path, headers) + "\r\n").encode()
+        return self.send(method, head, body)
+
+    def header(self, method, path, headers=None):
+        """
+        Build the request line and headers for a request on this session
+        as a bytes template with a %d left for the Content-Length, e.g.
+            head = session.header("POST", "/ords/...", {"Content-Type": ...})
+            session.send("POST", head % len(body), body)
+        Build it once and reuse it to skip re-assembling the same headers
+        for every request.
+        """
+
+        return (self._head(method, path, headers) + "Content-Length: %d\r\n\r\n").encode()
+
+    def send(self, method, head, body=None):
+        """
+        Send a request whose request line and headers are already encoded
+        (head, ending with the blank line) over the pooled connection,
+        with one socket write. Returns the same tuple as request().
+        head may also be the complete request, body included - e.g. a
+        memoryview of a buffer the caller reuses.
+        """
+
+        data = head + body if body else head
+        for attempt in range(2):
+            reused = self._sock is not None
+            if not reused:
+                self._open()
+            sent = False
+            try:
+                self._sock.write(data)
+                sent = True
+                return self._receive(method)
+            except OSError as e:
+                self.close()
+                # Only a reused connection may have gone stale - a fresh one
+                # failing is a real error. And it is only resent if the server
+                # cannot have acted on it: the write failed, or the connection
+                # was dropped before any response. After a timeout or a partial
+                # response it may have been processed - resending could
+                # duplicate a POST
+                if not reused or attempt > 0 or (sent and not isinstance(e, ConnectionDropped)):
+                    raise
+                Log.d("Session: connection to %s dropped (%s), reopening", self._host, e)
+
+    def pipeline(self, requests):
+        """
+        Send several GET (or HEAD) requests back to back over the pooled
+        connection before reading any of the responses, so they share one
+        round trip instead of each waiting for the one before it.
+        requests is a list of (method, path, headers) tuples. Returns a
+        list of (status, headers, body) tuples in the same order.
+
+        Only for requests that are safe to repeat: any the server has not
+        answered yet are sent again on a new connection if it drops.
+        """
+
+        results = []
+        retried = False
+        while len(results) < len(requests):
+            pending = requests[len(results):]
+            reused = self._sock is not None
+            if not reused:
+                self._open()
+            try:
+                self._sock.write(b"".join((self._head(m, p, h) + "\r\n").encode() for m, p, h in pending))
+                for m, p, h in pending:
+                    results.append(self._receive(m))
+                    if self._sock is None:
+                        # Server closed after this response - send the rest again
+                        break
+            except OSError as e:
+                self.close()
+                if not reused or retried:
+                    raise
+                retried = True
+                Log.d("Session: connection to %s dropped (%s), reopening", self._host, e)
+        return results
+
+    def connect(self):
+        """
+        Open the connection now if it is not open yet, so the first request
+        does not have to wait for the TCP and TLS handshakes.
+        """
+
+        if self._sock is None:
+            self._open()
+
+    def close(self):
+        """ Close the underlying connection - the next request reopens it """
+
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except:
+                pass
+            self._sock = None
+
+    def _open(self):
+        Log.d("Session: opening connection to %s:%d", self._host, self._port)
+        addr = socket.getaddrinfo(self._host, self._port, 0, socket.SOCK_STREAM)[0][-1]
+        s = socket.socket()
+        s.settimeout(self._timeout)
+        try:
+            s.connect(addr)
+            if self._port == 443:
+                s = ssl.wrap_socket(s, server_hostname=self._host)
+        except:
+            s.close()
+            raise
+        self._sock = s
+
+    def _head(self, method, path, headers):
+        request = f"{method} {path} HTTP/1.1\r\nHost: {self._host}\r\nConnection: keep-alive\r\n"
+        if headers:
+            for k in headers:
+                request += f"{k}: {headers[k]}\r\n"
+        return request
+
+    def _receive(self, method):
+        try:
+            line = self._sock.readline()
+        except OSError as e:
+            if e.args and e.args[0] == errno.ECONNRESET:
+                raise ConnectionDropped("connection reset by server")
+            raise
+        if not line:
+            raise ConnectionDropped("connection closed by server")
+        status = int(line.split(None, 2)[1])
+
+        headers = {}
+        while True:
+            line = self._sock.readline()
+            if not line or line == b"\r\n":
+                break
+            k, v = line.decode().split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+
+        if method == "HEAD" or status in (204, 304):
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = self._read_chunked()
+        elif "content-length" in headers:
+            body = self._read_exact(int(headers["content-length"]))
+        else:
+            # No length given - the server signals the end by closing
+            body = self._sock.read()
+            self.close()
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, headers, body
+
+    def _read_exact(self, n):
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self._sock.read(n - len(buf))
+            if not chunk:
+                raise OSError("connection closed mid-response")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _read_chunked(self):
+        buf = bytearray()
+        while True:
+            size = int(self._sock.readline().split(b";")[0], 16)
+            if size == 0:
+                # Skip any trailers up to the final blank line
+                while self._sock.readline() not in (b"\r\n", b""):
+                    pass
+                return bytes(buf)
+            buf.extend(self._read_exact(size))
+            self._sock.readline()
+
 class WebServer:
     """
     A skeleton webserver class that uses the Net class to run a blocking web server. Once
@@ -374,7 +640,7 @@ class WebServer:
                     Log.i(f"Client connected from {addr}")
                     request = cl.recv(1024).decode('utf-8')
                     #request = str(request)
-                    Log.d(f"Request: {request[:200] + "..." if len(request) > 200 else request}")
+                    Log.d(f"Request: {request[:200] + '...' if len(request) > 200 else request}")
                     
                     params = self.parse_request(request)
                     Log.d(f"Params: {params}")
@@ -7,13 +7,19 @@ Features:
 - Immediate occupancy (for debugging) logged to terminal
 - Validated occupancy (15s parked rule) shown on LCD as "X Avail"
 - Light strip: green when availability, flashing red when garage is full
-- Uses StateModel with two states: NORMAL and FULL_ALERT
+- Uses StateModel with three states: STARTUP, NORMAL and FULL_ALERT
 """
 
 import time
-from time import ticks_ms, ticks_diff
+from time import ticks_ms, ticks_diff, ticks_add, sleep_ms
+from array import array
 
-from Log import *
+try:
+    import _thread
+except ImportError:
+    _thread = None  # e.g. the simulator - events are then sent from stateDo
+
+from Log import Log
 from StateModel import StateModel
 from Displays import LCDDisplay
 from Sensors import DigitalSensor
@@ -21,18 +27,58 @@ from LightStrip import LightStrip
 from Lights import RED, GREEN
 from Button import Button
 from Net import Net
-from DAL import DAL
+from DAL import DAL, ENTRY, EXIT
 from secrets import WIFI_SSID, WIFI_PASSWORD
 
-# State definitions
-NORMAL = 0
-FULL_ALERT = 1
+# State definitions - the model always starts in state 0
+STARTUP = 0
+NORMAL = 1
+FULL_ALERT = 2
+
+# How long each of the startup screens stays on the LCD
+STARTUP_FRAME_MS = 2000
+
+# Levels - per-level state below is kept in arrays indexed by level
+NUM_LEVELS = 2
+LEVEL_NAMES = ("L1", "L2")
+
+# The tripped flags of all sensors share one byte: bit 2*level for the
+# entry sensor and bit 2*level+1 for the exit sensor of that level
+TRIP_ENTRY = tuple(1 << (2 * lvl) for lvl in range(NUM_LEVELS))
+TRIP_EXIT = tuple(1 << (2 * lvl + 1) for lvl in range(NUM_LEVELS))
+
+# Longest stateDo will go without running its checks, even with nothing due
+MAX_IDLE_MS = 1000
+
+# Slots in the sensor event ring shared with the APEX worker thread
+EVENT_RING_SIZE = 32
+
+
+class _SensorEvent:
+    """
+    One slot of the sensor event ring. The slots are created once and
+    overwritten in place, so recording an event allocates nothing.
+    """
+    __slots__ = ('level_id', 'sensor_type', 'ts_ms')
+
+    def __init__(self):
+        self.level_id = 0
+        self.sensor_type = None
+        self.ts_ms = 0
 
 
 class ParkingLotController:
     def __init__(self):
         # ----- Display -----
         self._display = LCDDisplay(sda=0, scl=1)
+        self._lcd_state = None  # (line0, line1) currently on the LCD
+        self._last_shown = None  # (L1 avail, L2 avail) currently on the LCD
+        # Status rows, updated in place so a refresh allocates nothing.
+        # The count is right aligned in columns 4-5
+        self._status_rows = (
+            bytearray(b"L1:  0 Avail    "),
+            bytearray(b"L2:  0 Avail    "),
+        )
 
         # ----- Config -----
         self._garage_name = "Garage A"
@@ -40,79 +86,87 @@ class ParkingLotController:
         # ----- Light strip (overall garage indicator) -----
         self._lightstrip = LightStrip(pin=17, numleds=8)
         self._garage_full = False
-        self._flash_on = False
-        self._last_flash_ms = 0
+        self._strip_color = None  # solid color on the strip, None if flashing/unknown
+
+        # Per-level state is stored level-indexed (0 = L1, 1 = L2) in flat
+        # arrays, so one handler serves every level
 
-        # ----- Raw sensor state tracking -----
-        self._L1_entry_tripped = False
-        self._L1_exit_tripped = False
-        self._L2_entry_tripped = False
-        self._L2_exit_tripped = False
+        # ----- Raw sensor state tracking (TRIP_* bits) -----
+        self._trip_bits = bytearray(1)
 
         # ----- Immediate occupancy (for debug / logs only) -----
-        self._L1_occupancy = 0
-        self._L2_occupancy = 0
+        self._occupancy = array('i', [0] * NUM_LEVELS)
 
         # Capacity per level
-        self._L1_capacity = 10
-        self._L2_capacity = 10
+        self._capacity = array('i', [10, 10])
+
+        # The two status-row characters for every count a level can show
+        # (0..capacity), worked out once: count n is at [2n] and [2n + 1]
+        self._count_chars = bytearray()
+        for n in range(max(self._capacity) + 1):
+            self._count_chars.append(0x30 + n // 10 % 10 if n >= 10 else 0x20)
+            self._count_chars.append(0x30 + n % 10)
 
         # ---- Map Pico Levels to Database Level IDs ----
         # These MUST match the level_id values from /parking/levels
-        self._L1_level_id_db = 101  # Garage A, Level 1
-        self._L2_level_id_db = 102  # Garage A, Level 2
-
-        # ----- Cooldown configuration (in milliseconds) -----
-        # Ignore repeated trips on the same sensor within this window
-        self._sensor_cooldown_ms = 1000  # 1 second
-
-        # Last time (in ms) that each sensor produced a *counted* event
-        self._last_L1_entry_ms = None
-        self._last_L1_exit_ms = None
-        self._last_L2_entry_ms = None
-        self._last_L2_exit_ms = None
+        self._level_id_db = (101, 102)  # Garage A, Level 1 / Level 2
 
         # ----- Validated occupancy (LCD uses this) -----
         # These only change after 15s "parked" confirmation or an exit
-        self._L1_valid_occupancy = 0
-        self._L2_valid_occupancy = 0
+        self._valid_occupancy = array('i', [0] * NUM_LEVELS)
 
         # Pending entries (waiting 15 seconds to count as "parked")
         self._entry_confirm_delay_ms = 5000  # 5 seconds (was 15; adjust as desired)
-        self._L1_pending_entry = False
-        self._L2_pending_entry = False
-        self._L1_pending_start_ms = None
-        self._L2_pending_start_ms = None
+        self._pending = bytearray(NUM_LEVELS)
+        self._pending_start_ms = [None] * NUM_LEVELS
+
+        # stateDo does nothing until this tick - the earliest pending entry
+        # confirmation or do action deadline. See _wake
+        self._next_deadline_ms = ticks_ms()
+
+        # Startup screens, shown while the model is already handling sensors
+        self._startup_phase = 0
+        self._startup_next_ms = 0
 
         # ----- State Model -----
-        # Two states: NORMAL and FULL_ALERT
-        self._model = StateModel(2, self, debug=True)
+        # Three states: STARTUP, NORMAL and FULL_ALERT
+        self._model = StateModel(3, self, debug=True)
 
         # Custom events to move between states
+        self._model.addCustomEvent("startup_done")
         self._model.addCustomEvent("garage_full")
         self._model.addCustomEvent("garage_not_full")
 
         # State transitions:
+        # STARTUP -> NORMAL once the intro screens have been shown
+        self._model.addTransition(STARTUP, ["startup_done"], NORMAL)
         # NORMAL -> FULL_ALERT when garage becomes full
         self._model.addTransition(NORMAL, ["garage_full"], FULL_ALERT)
         # FULL_ALERT -> NORMAL when garage is no longer full
         self._model.addTransition(FULL_ALERT, ["garage_not_full"], NORMAL)
 
         # ----- Sensors -----
+        # Edges closer together than this are contact bounce - the sensors
+        # drop them in their interrupt handler, before any event is raised
+        self._sensor_debounce_ms = 50
         # Level 1 sensors
         self._entrySensor_L1 = DigitalSensor(
-            pin=6, name="L1_entry", lowActive=False, handler=None
+            pin=6, name="L1_entry", lowActive=False, handler=None,
+            debounce_ms=self._sensor_debounce_ms,
         )
         self._exitSensor_L1 = DigitalSensor(
-            pin=5, name="L1_exit", lowActive=False, handler=None
+            pin=5, name="L1_exit", lowActive=False, handler=None,
+            debounce_ms=self._sensor_debounce_ms,
         )
 
         # Level 2 sensors
         self._entrySensor_L2 = DigitalSensor(
-            pin=21, name="L2_entry", lowActive=False, handler=None
+            pin=21, name="L2_entry", lowActive=False, handler=None,
+            debounce_ms=self._sensor_debounce_ms,
         )
         self._exitSensor_L2 = DigitalSensor(
-            pin=22, name="L2_exit", lowActive=False, handler=None
+            pin=22, name="L2_exit", lowActive=False, handler=None,
+            debounce_ms=self._sensor_debounce_ms,
         )
 
         self._model.addSensor(self._entrySensor_L1)
@@ -125,8 +179,62 @@ class ParkingLotController:
         self._model.addButton(self._reset_button)
 
         # ----- Networking / Database (Oracle APEX) -----
-        self._net = Net()
+        # One shared Net, so every networked part reuses the same connections
+        self._net = Net.default()
         self._dal = DAL(self._net)
+        # Bound once here rather than looked up on every sensor event
+        self._enqueue_sensor_event = self._dal.enqueue_sensor_event
+
+        # Sensor events go into a small ring that a worker thread on the
+        # second core moves into the DAL and POSTs (see _event_worker), so
+        # neither sensor handling nor stateDo ever waits on the network.
+        # Only the worker touches the DAL while it runs.
+        # NOTE: this relies on the network stack (lwIP / cyw43 driver) being
+        # used from one core at a time - it is not safe to call from both.
+        # Wi-Fi is brought up before the worker starts and the connection is
+        # only closed after it has finished, so while it runs every socket
+        # call happens on its core. Nothing on the main core may use the
+        # network (Net, DAL, sockets) during that time.
+        self._event_ring = [_SensorEvent() for _ in range(EVENT_RING_SIZE)]
+        self._ring_head = 0     # next slot to take
+        self._ring_tail = 0     # next slot to fill
+        self._ring_dropped = 0  # events overwritten because the ring was full
+        self._ring_lock = _thread.allocate_lock() if _thread else None
+        self._worker_running = False
+        self._worker_done = True
+
+        self._flush_interval_ms = 500
+        # Cap on events sent per flush (one /events/batch POST). Kept small
+        # when flushing from stateDo, since the model loop waits for it
+        self._flush_max_events = 8
+        self._worker_flush_max_events = 16
+        self._last_flush_ms = ticks_ms()
+        # Warn once the backlog of unsent events grows past this
+        self._backlog_warn = 32
+        self._backlog_warned = False
+
+        # ----- Per-state actions, looked up once per call -----
+        self._entry_actions = {
+            STARTUP: self._enter_startup,
+            NORMAL: self._enter_status,
+            FULL_ALERT: self._enter_status,
+        }
+        # The FULL_ALERT flashing needs none - it runs on the strip's own
+        # timer (see _update_garage_lights)
+        self._do_actions = {
+            STARTUP: self._do_startup,
+        }
+
+        # ----- In-state events: one dict lookup instead of an if-chain -----
+        # event -> (handler, argument): the level index for trips, the mask
+        # that clears the sensor's TRIP_* bit for untrips
+        self._event_handlers = {"reset_press": (self._on_reset_press, None)}
+        for lvl in range(NUM_LEVELS):
+            name = LEVEL_NAMES[lvl]
+            self._event_handlers[name + "_entry_trip"] = (self._on_entry_trip, lvl)
+            self._event_handlers[name + "_entry_untrip"] = (self._on_untrip, ~TRIP_ENTRY[lvl] & 0xFF)
+            self._event_handlers[name + "_exit_trip"] = (self._on_exit_trip, lvl)
+            self._event_handlers[name + "_exit_untrip"] = (self._on_untrip, ~TRIP_EXIT[lvl] & 0xFF)
 
     # -------------------------------------------------------------------------
     # Helper methods
@@ -151,14 +259,27 @@ class ParkingLotController:
 
         self._display.showText(text, row, 0)
 
-    def _cooldown_ok(self, last_ts, now_ms):
+    def _set_lcd(self, line0, line1):
         """
-        Return True if enough time has passed since last_ts for this sensor
-        to be considered 'ready' again.
+        Show a two-line frame on the LCD. Skipped entirely if the same
+        frame is already showing, since a redraw is the slowest thing the
+        loop does (a burst of I2C traffic). No clear() is needed - both rows
+        are space padded to the full width, so they overwrite everything.
         """
-        if last_ts is None:
-            return True
-        return ticks_diff(now_ms, last_ts) > self._sensor_cooldown_ms
+        self._last_shown = None
+        frame = (line0, line1)
+        if frame == self._lcd_state:
+            return
+        self._write_line(0, line0)
+        self._write_line(1, line1)
+        self._lcd_state = frame
+
+    def _wake(self, deadline_ms):
+        """
+        Make sure stateDo runs its checks no later than deadline_ms.
+        """
+        if ticks_diff(deadline_ms, self._next_deadline_ms) < 0:
+            self._next_deadline_ms = deadline_ms
 
     def _update_garage_lights(self):
         """
@@ -166,10 +287,11 @@ class ParkingLotController:
         Garage is considered FULL when BOTH levels are at capacity.
         Also drives state transitions via custom events.
         """
-        full = (
-            self._L1_valid_occupancy >= self._L1_capacity
-            and self._L2_valid_occupancy >= self._L2_capacity
-        )
+        full = True
+        for lvl in range(NUM_LEVELS):
+            if self._valid_occupancy[lvl] < self._capacity[lvl]:
+                full = False
+                break
 
         # If state didn't change, no need to touch LEDs or states
         if full == self._garage_full:
@@ -179,87 +301,224 @@ class ParkingLotController:
 
         if full:
             Log.i("Garage is FULL -> triggering FULL_ALERT state")
-            # Move NORMAL -> FULL_ALERT
-            self._model.processEvent("garage_full")
-            # Start flashing red
-            self._flash_on = True
-            self._lightstrip.setColor(RED)
+            # Move NORMAL -> FULL_ALERT (unless the model is there already)
+            if self._model.getState() != FULL_ALERT:
+                self._model.processEvent("garage_full")
+            # Flash between bright and dim red (warning pulse). The strip
+            # keeps this going on its own timer, nothing to poll here
+            self._lightstrip.flash(RED, (80, 0, 0), 500)
+            self._strip_color = None
         else:
             Log.i("Garage is NOT full -> triggering NORMAL state")
-            # Move FULL_ALERT -> NORMAL
-            self._model.processEvent("garage_not_full")
-            # Solid green when not full
-            self._flash_on = False
-            self._lightstrip.setColor(GREEN)
+            # Move FULL_ALERT -> NORMAL (unless the model is there already)
+            if self._model.getState() != NORMAL:
+                self._model.processEvent("garage_not_full")
+            # Solid green when not full (this also stops the flashing)
+            self._set_color(GREEN)
 
-        # Note: flashing behavior is handled in stateDo when in FULL_ALERT
+    def _set_color(self, color):
+        """
+        Set the whole strip to color, skipping the strip refresh if it
+        already shows exactly that.
+        """
+        if color != self._strip_color:
+            self._lightstrip.setColor(color)
+            self._strip_color = color
 
     def _show_validated_occupancy(self):
         """
         Show the validated (15s-confirmed) available spots for both levels.
+        Held back while the startup screens are showing - entering NORMAL
+        shows the status (and syncs the lights) then.
         """
-        l1_avail = self._L1_capacity - self._L1_valid_occupancy
-        l2_avail = self._L2_capacity - self._L2_valid_occupancy
+        if self._model.getState() == STARTUP:
+            return
 
-        self._display.clear()
-        self._display.showText(f"L1: {l1_avail} Avail", 0, 0)
-        self._display.showText(f"L2: {l2_avail} Avail", 1, 0)
+        l1_avail = self._capacity[0] - self._valid_occupancy[0]
+        l2_avail = self._capacity[1] - self._valid_occupancy[1]
+
+        # Only touch the LCD if the numbers changed
+        avail = (l1_avail, l2_avail)
+        if avail != self._last_shown:
+            chars = self._count_chars
+            for row in range(NUM_LEVELS):
+                line = self._status_rows[row]
+                i = 2 * avail[row]
+                line[4] = chars[i]
+                line[5] = chars[i + 1]
+                self._display.showText(line, row, 0)
+            self._lcd_state = None  # not a _set_lcd frame
+            self._last_shown = avail
 
         # Sync lights and state with the new validated values
         self._update_garage_lights()
 
-    def _record_sensor_event(self, level_id, sensor_type):
+    def _record_sensor_event(self, level_id, sensor_type, ts_ms=None):
         """
-        Send a single sensor event to the Oracle APEX backend.
+        Queue a single sensor event for the Oracle APEX backend.
+        It is sent with a later batch by the worker thread (or from stateDo
+        when there is no worker). Never waits on the network.
 
         level_id: DB level_id (e.g., 101, 102)
-        sensor_type: "entry" or "exit"
+        sensor_type: ENTRY or EXIT
+        ts_ms: ticks_ms() when the sensor event came in
         """
-        if not hasattr(self, "_dal") or self._dal is None:
-            Log.e("DAL is not initialized; skipping sensor event")
-            return
+        Log.i("Recording sensor event -> level_id=%d, sensor_type=%s", level_id, sensor_type)
+
+        if ts_ms is None:
+            ts_ms = ticks_ms()
+
+        if self._worker_running:
+            # Hand the event over to the worker - the lock is only ever held
+            # for a few list/index operations. The flag is checked again
+            # under the lock, as the worker clears it (under the lock) if it
+            # exits, and nothing would drain the ring after that
+            with self._ring_lock:
+                if self._worker_running:
+                    tail = self._ring_tail
+                    slot = self._event_ring[tail]
+                    slot.level_id = level_id
+                    slot.sensor_type = sensor_type
+                    slot.ts_ms = ts_ms
+                    tail = (tail + 1) % EVENT_RING_SIZE
+                    if tail == self._ring_head:
+                        # Full - the oldest event is overwritten
+                        self._ring_head = (tail + 1) % EVENT_RING_SIZE
+                        self._ring_dropped += 1
+                    self._ring_tail = tail
+                    return
+
+        # No worker - queue it directly, stateDo sends it
+        self._enqueue(level_id, sensor_type, ts_ms)
+
+    def _enqueue(self, level_id, sensor_type, ts_ms):
+        try:
+            self._enqueue_sensor_event(level_id, sensor_type, ts_ms)
+        except Exception as e:
+            # Never crash the controller because of the backend
+            Log.e(f"Failed to queue sensor event for APEX: {e}")
 
-        Log.i(
-            f"Recording sensor event -> level_id={level_id}, "
-            f"sensor_type={sensor_type}"
-        )
+    def _drain_ring(self):
+        """
+        Move every event waiting in the ring into the DAL queue.
+        Runs on the worker thread.
+        """
+        while True:
+            with self._ring_lock:
+                head = self._ring_head
+                if head == self._ring_tail:
+                    dropped = self._ring_dropped
+                    self._ring_dropped = 0
+                    break
+                # Copy the slot out while holding the lock - once released,
+                # the producer may reuse it
+                slot = self._event_ring[head]
+                level_id = slot.level_id
+                sensor_type = slot.sensor_type
+                ts_ms = slot.ts_ms
+                self._ring_head = (head + 1) % EVENT_RING_SIZE
+            self._enqueue(level_id, sensor_type, ts_ms)
+
+        if dropped:
+            Log.e("Sensor event ring full, %d events dropped", dropped)
+
+    def _event_worker(self):
+        """
+        Worker thread body: feed the DAL from the ring and POST batches
+        to APEX until stop() asks it to finish.
 
+        An error in one pass is logged and the loop carries on. If the
+        worker exits for any other reason it switches the controller back
+        to sending from stateDo, so sensor events are never left in a ring
+        nobody drains.
+        """
         try:
-            resp = self._dal.send_sensor_event(level_id, sensor_type)
-            Log.i(f"APEX event OK: {resp}")
+            # Do the TLS handshake now, off the main core, rather than
+            # with the first sensor event
+            self._dal.connect()
+            while self._worker_running:
+                try:
+                    self._drain_ring()
+                    self._pump(ticks_ms())
+                    sleep_ms(5)
+                except Exception as e:
+                    Log.e("APEX worker error: %s", e)
+                    sleep_ms(500)
         except Exception as e:
-            # Never crash the controller because the network is down
-            Log.e(f"Failed to send sensor event to APEX: {e}")
+            Log.e("APEX worker stopped: %s", e)
+        finally:
+            with self._ring_lock:
+                if self._worker_running:
+                    Log.e("APEX worker exited, sending from stateDo")
+                self._worker_running = False
+            # Nothing is added to the ring from here on - hand what is
+            # left in it to the DAL
+            try:
+                self._drain_ring()
+            finally:
+                self._worker_done = True
+
+    def _start_worker(self):
+        """
+        Start the APEX worker thread. Without _thread, or if the thread
+        can't be started, events are sent from stateDo instead.
+        """
+        if _thread is None:
+            return
+        self._worker_running = True
+        self._worker_done = False
+        try:
+            _thread.start_new_thread(self._event_worker, ())
+        except Exception as e:
+            Log.e(f"Could not start APEX worker, sending from stateDo: {e}")
+            self._worker_running = False
+            self._worker_done = True
+
+    def _stop_worker(self):
+        """
+        Ask the worker thread to finish and wait until it has.
+        """
+        self._worker_running = False
+        while not self._worker_done:
+            sleep_ms(10)
+
+    def _pump(self, now_ms):
+        """
+        Send a batch of queued sensor events to APEX, at most once per
+        flush interval. Called from the worker thread, or from stateDo when
+        there is no worker, so the network I/O never happens inside sensor
+        event handling.
+        """
+        if ticks_diff(now_ms, self._last_flush_ms) < self._flush_interval_ms:
+            return
+        self._last_flush_ms = now_ms
+        if self._worker_running:
+            self._dal.flush_events(self._worker_flush_max_events)
+        else:
+            self._dal.flush_events(self._flush_max_events)
 
-    def _show_startup_sequence(self):
+        backlog = self._dal.pending_count() > self._backlog_warn
+        if backlog and not self._backlog_warned:
+            Log.e(f"APEX unreachable? {self._dal.pending_count()} sensor events waiting to be sent")
+        self._backlog_warned = backlog
+
+    def _show_startup_frame(self, phase):
         """
-        Show a little intro on the LCD before starting the state model.
+        Show startup screen number phase (0-2) on the LCD.
         Keeps messages within 16 characters per line.
         """
-        # 1) Greeting
-        self._display.clear()
-        self._write_line(0, " Hello from")
-        self._write_line(1, f" {self._garage_name}")
-        time.sleep(2)
-
-        # 2) Current time (HH:MM)
-        now = time.localtime()
-        hh = now[3]
-        mm = now[4]
-
-        self._display.clear()
-        self._write_line(0, " Time:")
-        self._write_line(1, f"   {hh:02d}:{mm:02d}")
-        time.sleep(2)
-
-        # 3) Garage open message
-        self._display.clear()
-        self._write_line(0, " Garage is now")
-        self._write_line(1, "   OPEN!")
-        time.sleep(2)
-
-        # 4) Transition to normal availability view
-        self._show_validated_occupancy()
+        if phase == 0:
+            # 1) Greeting
+            self._set_lcd(" Hello from", f" {self._garage_name}")
+        elif phase == 1:
+            # 2) Current time (HH:MM)
+            now = time.localtime()
+            hh = now[3]
+            mm = now[4]
+            self._set_lcd(" Time:", f"   {hh:02d}:{mm:02d}")
+        else:
+            # 3) Garage open message
+            self._set_lcd(" Garage is now", "   OPEN!")
 
     def _reset_garage(self):
         """
@@ -267,28 +526,21 @@ class ParkingLotController:
         """
         Log.i("Reset button pressed: resetting garage state")
 
-        # Clear immediate and validated occupancy
-        self._L1_occupancy = 0
-        self._L2_occupancy = 0
-        self._L1_valid_occupancy = 0
-        self._L2_valid_occupancy = 0
+        for lvl in range(NUM_LEVELS):
+            # Clear immediate and validated occupancy
+            self._occupancy[lvl] = 0
+            self._valid_occupancy[lvl] = 0
 
-        # Clear pending entries
-        self._L1_pending_entry = False
-        self._L1_pending_start_ms = None
-        self._L2_pending_entry = False
-        self._L2_pending_start_ms = None
+            # Clear pending entries
+            self._pending[lvl] = 0
+            self._pending_start_ms[lvl] = None
 
         # Clear tripped flags
-        self._L1_entry_tripped = False
-        self._L1_exit_tripped = False
-        self._L2_entry_tripped = False
-        self._L2_exit_tripped = False
+        self._trip_bits[0] = 0
 
         # Force a "not full" transition via the usual logic
         # by pretending we WERE full and letting _update_garage_lights fix it.
         self._garage_full = True
-        self._flash_on = False
 
         # This will:
         # - Show "L1: 10 Avail / L2: 10 Avail"
@@ -296,6 +548,107 @@ class ParkingLotController:
         # - Trigger garage_not_full event and go to NORMAL state if needed
         self._show_validated_occupancy()
 
+    # -------------------------------------------------------------------------
+    # Per-state actions (dispatched from the StateModel callbacks below)
+    # -------------------------------------------------------------------------
+    def _enter_startup(self, event):
+        """
+        Entry action for STARTUP: show the first intro screen. stateDo
+        moves on through the others (see _do_startup).
+        """
+        self._startup_phase = 0
+        self._show_startup_frame(0)
+        self._startup_next_ms = ticks_add(ticks_ms(), STARTUP_FRAME_MS)
+
+    def _do_startup(self, now_ms):
+        """
+        Do action for STARTUP: advance to the next intro screen every
+        STARTUP_FRAME_MS, then go to NORMAL. Never sleeps, so sensor events
+        are handled from the moment the model starts.
+        """
+        if ticks_diff(now_ms, self._startup_next_ms) >= 0:
+            self._startup_phase += 1
+            if self._startup_phase > 2:
+                self._model.processEvent("startup_done")
+                return
+            self._show_startup_frame(self._startup_phase)
+            self._startup_next_ms = ticks_add(now_ms, STARTUP_FRAME_MS)
+        self._wake(self._startup_next_ms)
+
+    def _enter_status(self, event):
+        """
+        Entry action for NORMAL and FULL_ALERT: the LCD (and lights)
+        should reflect the current status.
+        """
+        self._show_validated_occupancy()
+
+    # -------------------------------------------------------------------------
+    # In-state event handlers (looked up in _event_handlers by stateEvent)
+    # -------------------------------------------------------------------------
+    def _on_reset_press(self, arg, now_ms):
+        """ Reset button: clear all counts and go back to NORMAL. """
+        self._reset_garage()
+        return True
+
+    def _on_entry_trip(self, lvl, now_ms):
+        """ Car at the entry of level lvl: start a pending entry and log it. """
+        # Only start a NEW pending entry if:
+        # - sensor wasn't already marked tripped
+        # - there's no pending entry already in progress
+        # (contact bounce is already filtered out by the sensor itself)
+        if not self._trip_bits[0] & TRIP_ENTRY[lvl] and not self._pending[lvl]:
+            self._trip_bits[0] |= TRIP_ENTRY[lvl]
+
+            # Start pending entry for validated count
+            self._pending[lvl] = 1
+            self._pending_start_ms[lvl] = now_ms
+            self._wake(ticks_add(now_ms, self._entry_confirm_delay_ms))
+
+            # Log this raw event to the backend (DB level id)
+            self._record_sensor_event(
+                level_id=self._level_id_db[lvl],
+                sensor_type=ENTRY,
+                ts_ms=now_ms,
+            )
+
+            # IMMEDIATE count (for terminal logging) – exactly once per pending entry
+            if self._occupancy[lvl] < self._capacity[lvl]:
+                self._occupancy[lvl] += 1
+            Log.i("%s immediate occupancy: %d/%d", LEVEL_NAMES[lvl], self._occupancy[lvl], self._capacity[lvl])
+        return True
+
+    def _on_exit_trip(self, lvl, now_ms):
+        """ Car leaving level lvl: free a spot and log it. """
+        if not self._trip_bits[0] & TRIP_EXIT[lvl]:
+            self._trip_bits[0] |= TRIP_EXIT[lvl]
+
+            # Log this raw event to the backend
+            self._record_sensor_event(
+                level_id=self._level_id_db[lvl],
+                sensor_type=EXIT,
+                ts_ms=now_ms,
+            )
+
+            # IMMEDIATE count (for terminal logging)
+            if self._occupancy[lvl] > 0:
+                self._occupancy[lvl] -= 1
+            Log.i("%s immediate occupancy: %d/%d", LEVEL_NAMES[lvl], self._occupancy[lvl], self._capacity[lvl])
+
+            # If an entry was still pending, cancel it (pass-through)
+            self._pending[lvl] = 0
+            self._pending_start_ms[lvl] = None
+
+            # For validated count, a car exiting frees a spot immediately
+            if self._valid_occupancy[lvl] > 0:
+                self._valid_occupancy[lvl] -= 1
+                self._show_validated_occupancy()
+        return True
+
+    def _on_untrip(self, mask, now_ms):
+        """ A sensor is clear again - mask clears its TRIP_* bit. """
+        self._trip_bits[0] &= mask
+        return True
+
     # -------------------------------------------------------------------------
     # StateModel required callbacks
     # -------------------------------------------------------------------------
@@ -303,17 +656,20 @@ class ParkingLotController:
         """
         Entry actions for a state (called once when entering the state).
         """
-        Log.d(f"State {state} entered on event {event}")
+        Log.d("State %d entered on event %s", state, event)
+
+        # The new state may have its own do actions - run them next tick
+        self._wake(ticks_ms())
 
-        # For both states, we want the LCD (and lights) to reflect current status
-        if state in (NORMAL, FULL_ALERT):
-            self._show_validated_occupancy()
+        action = self._entry_actions.get(state)
+        if action:
+            action(event)
 
     def stateLeft(self, state, event):
         """
         Exit actions for a state.
         """
-        Log.d(f"State {state} exited on event {event}")
+        Log.d("State %d exited on event %s", state, event)
 
     def stateEvent(self, state, event) -> bool:
         """
@@ -323,158 +679,12 @@ class ParkingLotController:
         now_ms = ticks_ms()
 
         # Global trace so we can see everything coming in
-        Log.d(f"stateEvent: state={state}, event={event}")
-
-        # ---------- Reset Button ----------
-        if event == "reset_press":
-            self._reset_garage()
-            return True
-
-        # ---------- Level 1 Sensors ----------
-        if event == "L1_entry_trip":
-            # Only start a NEW pending entry if:
-            # - sensor wasn't already marked tripped
-            # - there's no pending entry already in progress
-            # - cooldown window has passed
-            if (
-                not self._L1_entry_tripped
-                and not self._L1_pending_entry
-                and self._cooldown_ok(self._last_L1_entry_ms, now_ms)
-            ):
-                self._L1_entry_tripped = True
-                self._last_L1_entry_ms = now_ms
-
-                # Start pending entry for validated count
-                self._L1_pending_entry = True
-                self._L1_pending_start_ms = now_ms
-
-                # Log this raw event to the backend (DB level id)
-                self._record_sensor_event(
-                    level_id=self._L1_level_id_db,
-                    sensor_type="entry",
-                )
-
-                # IMMEDIATE count (for terminal logging) – exactly once per pending entry
-                if self._L1_occupancy < self._L1_capacity:
-                    self._L1_occupancy += 1
-                Log.i(
-                    f"L1 immediate occupancy: "
-                    f"{self._L1_occupancy}/{self._L1_capacity}"
-                )
-            return True
-
-        if event == "L1_entry_untrip":
-            if self._L1_entry_tripped:
-                self._L1_entry_tripped = False
-            return True
-
-        if event == "L1_exit_trip":
-            if (
-                not self._L1_exit_tripped
-                and self._cooldown_ok(self._last_L1_exit_ms, now_ms)
-            ):
-                self._L1_exit_tripped = True
-                self._last_L1_exit_ms = now_ms
-
-                # Log this raw event to the backend
-                self._record_sensor_event(
-                    level_id=self._L1_level_id_db,
-                    sensor_type="exit",
-                )
-
-                # IMMEDIATE count (for terminal logging)
-                if self._L1_occupancy > 0:
-                    self._L1_occupancy -= 1
-                Log.i(
-                    f"L1 immediate occupancy: "
-                    f"{self._L1_occupancy}/{self._L1_capacity}"
-                )
-
-                # If an entry was still pending, cancel it (pass-through)
-                self._L1_pending_entry = False
-                self._L1_pending_start_ms = None
-
-                # For validated count, a car exiting frees a spot immediately
-                if self._L1_valid_occupancy > 0:
-                    self._L1_valid_occupancy -= 1
-                    self._show_validated_occupancy()
-            return True
-
-        if event == "L1_exit_untrip":
-            if self._L1_exit_tripped:
-                self._L1_exit_tripped = False
-            return True
-
-        # ---------- Level 2 Sensors ----------
-        if event == "L2_entry_trip":
-            if (
-                not self._L2_entry_tripped
-                and not self._L2_pending_entry
-                and self._cooldown_ok(self._last_L2_entry_ms, now_ms)
-            ):
-                self._L2_entry_tripped = True
-                self._last_L2_entry_ms = now_ms
-
-                # Start pending entry
-                self._L2_pending_entry = True
-                self._L2_pending_start_ms = now_ms
-
-                # Log this raw event to the backend
-                self._record_sensor_event(
-                    level_id=self._L2_level_id_db,
-                    sensor_type="entry",
-                )
-
-                # IMMEDIATE count – only once per pending entry
-                if self._L2_occupancy < self._L2_capacity:
-                    self._L2_occupancy += 1
-                Log.i(
-                    f"L2 immediate occupancy: "
-                    f"{self._L2_occupancy}/{self._L2_capacity}"
-                )
-            return True
-
-        if event == "L2_entry_untrip":
-            if self._L2_entry_tripped:
-                self._L2_entry_tripped = False
-            return True
-
-        if event == "L2_exit_trip":
-            if (
-                not self._L2_exit_tripped
-                and self._cooldown_ok(self._last_L2_exit_ms, now_ms)
-            ):
-                self._L2_exit_tripped = True
-                self._last_L2_exit_ms = now_ms
-
-                # Log this raw event to the backend
-                self._record_sensor_event(
-                    level_id=self._L2_level_id_db,
-                    sensor_type="exit",
-                )
-
-                # IMMEDIATE count (for terminal logging)
-                if self._L2_occupancy > 0:
-                    self._L2_occupancy -= 1
-                Log.i(
-                    f"L2 immediate occupancy: "
-                    f"{self._L2_occupancy}/{self._L2_capacity}"
-                )
-
-                # Cancel pending entry if any (pass-through)
-                self._L2_pending_entry = False
-                self._L2_pending_start_ms = None
-
-                # Validated count: car left
-                if self._L2_valid_occupancy > 0:
-                    self._L2_valid_occupancy -= 1
-                    self._show_validated_occupancy()
-            return True
+        Log.d("stateEvent: state=%d, event=%s", state, event)
 
-        if event == "L2_exit_untrip":
-            if self._L2_exit_tripped:
-                self._L2_exit_tripped = False
-            return True
+        entry = self._event_handlers.get(event)
+        if entry:
+            handler, arg = entry
+            return handler(arg, now_ms)
 
         # All other events are not handled here
         return False
@@ -482,52 +692,42 @@ class ParkingLotController:
     def stateDo(self, state):
         """
         Called repeatedly while in a state.
-        We use this to handle the 15s "parked" confirmation and flashing lights.
+        We use this to handle the 15s "parked" confirmation and, when there
+        is no worker thread, sending queued sensor events to APEX.
         """
         now_ms = ticks_ms()
 
-        # ----- Check pending entries for Level 1 -----
-        if self._L1_pending_entry and self._L1_pending_start_ms is not None:
-            if ticks_diff(now_ms, self._L1_pending_start_ms) >= self._entry_confirm_delay_ms:
-                # Time has passed without an exit -> parked car
-                self._L1_pending_entry = False
-                self._L1_pending_start_ms = None
-
-                if self._L1_valid_occupancy < self._L1_capacity:
-                    self._L1_valid_occupancy += 1
-                    Log.i(
-                        f"L1 VALIDATED occupancy: "
-                        f"{self._L1_valid_occupancy}/{self._L1_capacity}"
-                    )
-                    self._show_validated_occupancy()
+        # ----- Send queued sensor events to APEX (if there is no worker) -----
+        if not self._worker_running:
+            self._pump(now_ms)
+
+        # Most ticks nothing is due yet - a single compare and we're done
+        if ticks_diff(now_ms, self._next_deadline_ms) < 0:
+            return
+        # Everything below pulls this in again (via _wake) if it needs to
+        self._next_deadline_ms = ticks_add(now_ms, MAX_IDLE_MS)
+
+        # ----- Check pending entries on every level -----
+        for lvl in range(NUM_LEVELS):
+            if self._pending[lvl] and self._pending_start_ms[lvl] is not None:
+                due_ms = ticks_add(self._pending_start_ms[lvl], self._entry_confirm_delay_ms)
+                if ticks_diff(now_ms, due_ms) < 0:
+                    self._wake(due_ms)
+                    continue
 
-        # ----- Check pending entries for Level 2 -----
-        if self._L2_pending_entry and self._L2_pending_start_ms is not None:
-            if ticks_diff(now_ms, self._L2_pending_start_ms) >= self._entry_confirm_delay_ms:
                 # Time has passed without an exit -> parked car
-                self._L2_pending_entry = False
-                self._L2_pending_start_ms = None
-
-                if self._L2_valid_occupancy < self._L2_capacity:
-                    self._L2_valid_occupancy += 1
-                    Log.i(
-                        f"L2 VALIDATED occupancy: "
-                        f"{self._L2_valid_occupancy}/{self._L2_capacity}"
-                    )
-                    self._show_validated_occupancy()
+                self._pending[lvl] = 0
+                self._pending_start_ms[lvl] = None
 
-        # ----- Flash lights if garage is full and we're in FULL_ALERT state -----
-        if self._garage_full and state == FULL_ALERT:
-            # Flash every 500 ms between bright and dim red
-            if ticks_diff(now_ms, self._last_flash_ms) >= 500:
-                self._last_flash_ms = now_ms
-                self._flash_on = not self._flash_on
+                if self._valid_occupancy[lvl] < self._capacity[lvl]:
+                    self._valid_occupancy[lvl] += 1
+                    Log.i("%s VALIDATED occupancy: %d/%d", LEVEL_NAMES[lvl], self._valid_occupancy[lvl], self._capacity[lvl])
+                    self._show_validated_occupancy()
 
-                if self._flash_on:
-                    self._lightstrip.setColor(RED)
-                else:
-                    # Dimmer red (warning pulse)
-                    self._lightstrip.setColor((80, 0, 0))
+        # ----- State specific do actions -----
+        action = self._do_actions.get(state)
+        if action:
+            action(now_ms)
 
     # -------------------------------------------------------------------------
     # Public API
@@ -542,7 +742,8 @@ class ParkingLotController:
         except Exception as e:
             Log.e(f"Wi-Fi connection failed: {e}")
 
-        self._show_startup_sequence()
+        self._start_worker()
+        # Starts in STARTUP, which shows the intro screens
         self._model.run()
 
     def stop(self):
@@ -550,6 +751,15 @@ class ParkingLotController:
         Stop the state model.
         """
         self._model.stop()
+        self._lightstrip.stopFlash()
+        self._stop_worker()
+        # Send anything still queued before dropping the connection
+        self._dal.flush_events(drain=True)
+        left = self._dal.pending_count()
+        if left:
+            # e.g. APEX unreachable (flushes backed off) at shutdown
+            Log.e("Stopping with %d sensor events not sent to APEX", left)
+        self._dal.close()
 
 
 # Optional standalone test (used only if running this file directly)
@@ -9,7 +9,7 @@
 import utime
 import math
 import dht
-from machine import Pin, ADC
+from machine import Pin, ADC, Timer
 from collections import namedtuple
 from mpu6050 import *
 from Log import *
@@ -57,11 +57,24 @@ class DigitalSensor(Sensor):
     pin: the pin number to which the sensor is connected
     name: the name of the sensor
     lowActive: set to True if the sensor gets low when tripped.
+    debounce_ms: edges within this many ms of the last reported one are
+    ignored right in the interrupt handler, so contact bounce never reaches
+    the handler. The pin is read again once that time is up, so a change
+    that settled during it is still reported. 0 (default) reports every edge.
     """
 
-    def __init__(self, pin, name='Digital Sensor', lowActive=True, handler=None):
+    # Defaults for subclasses that skip this __init__ (e.g. TiltSensor)
+    _debounce_ms = 0
+
+    def __init__(self, pin, name='Digital Sensor', lowActive=True, handler=None, debounce_ms=0):
         super().__init__(name, lowActive)
         self._pinio = Pin(pin, Pin.IN, Pin.PULL_UP)
+        self._debounce_ms = debounce_ms
+        self._lastEdge = 0
+        self._lastValue = None
+        # One-shot timer to read the pin again at the end of a bounce window
+        self._settleTimer = Timer(-1) if debounce_ms else None
+        self._settlePending = False
         self._handler = None
         self.setHandler(handler)
 
@@ -71,7 +84,7 @@ class DigitalSensor(Sensor):
     def tripped(self)->bool:
         v = self.rawValue()
         if (self._lowActive and v == 0) or (not self._lowActive and v == 1):
-            Log.i(f"DigitalSensor {self._name}: sensor tripped")
+            Log.i("DigitalSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
@@ -94,14 +107,37 @@ class DigitalSensor(Sensor):
     def _callback(self, pin):
         """ The private interrupt handler - will call appropriate handlers """
         
+        if self._debounce_ms:
+            t = utime.ticks_ms()
+            left = self._debounce_ms - utime.ticks_diff(t, self._lastEdge)
+            if left > 0:
+                # Still inside the bounce window - check the pin again when
+                # it is over, so a change that settles in it is not lost
+                if not self._settlePending:
+                    self._settlePending = True
+                    self._settleTimer.init(period=left + 1, mode=Timer.ONE_SHOT, callback=self._settled)
+                return
+            # Drop repeats of the level we last reported
+            v = self._pinio.value()
+            if v == self._lastValue:
+                return
+            self._lastEdge = t
+            self._lastValue = v
+
         if self._handler is not None:
             if self.tripped():
-                Log.i(f'Sensor {self._name} tripped')
+                Log.i('Sensor %s tripped', self._name)
                 self._handler.sensorTripped(self._name)
             else:
-                Log.i(f'Sensor {self._name} untripped')
+                Log.i('Sensor %s untripped', self._name)
                 self._handler.sensorUntripped(self._name)
 
+    def _settled(self, timer):
+        """ Bounce window over - report the pin if it ended up changed """
+
+        self._settlePending = False
+        self._callback(self._pinio)
+
 class TiltSensor(DigitalSensor):
     """
     A tilt sensor looks like a cap but has just a metal ball on two contacts
@@ -126,7 +162,7 @@ class TiltSensor(DigitalSensor):
         tripped when the value goes high, so there it is never lowActive
         """
         if self.rawValue() == 1:
-            Log.i(f"TiltSensor {self._name}: sensor tripped")
+            Log.i("TiltSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
@@ -151,7 +187,7 @@ class AnalogSensor(Sensor):
         
         v = self.rawValue()
         if (self._lowActive and v < self._threshold) or (not self._lowActive and v > self._threshold):
-            Log.i(f"AnalogSensor {self._name}: sensor tripped")
+            Log.i("AnalogSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
@@ -264,7 +300,7 @@ class UltrasonicSensor(Sensor):
         
         v = self.rawValue()
         if (self._lowActive and v < self._threshold) or (not self._lowActive and v > self._threshold):
-            Log.i(f"UltrasonicSensor {self._name}: sensor tripped")
+            Log.i("UltrasonicSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
@@ -342,7 +378,7 @@ class DHTSensor(Sensor, TemperatureSensor):
             tripped = self.temperature() >= self._threshold
         
         if tripped:
-            Log.i(f"DHT Sensor {self._name}: sensor tripped")
+            Log.i("DHT Sensor %s: sensor tripped", self._name)
             
         return tripped
         
@@ -438,7 +474,7 @@ class MPU(Sensor, TemperatureSensor):
             tripped = self.temperature() >= self._threshold
         
         if tripped:
-            Log.i(f"DHT Sensor {self._name}: sensor tripped")
+            Log.i("DHT Sensor %s: sensor tripped", self._name)
             
         return tripped
 
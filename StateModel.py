@@ -87,6 +87,9 @@ class StateModel:
         self._transitions = []
         for i in range(0, numstates):
             self._transitions.append(None)
+        # Same transitions indexed as {event: toState} per state, so finding
+        # the transition for an event is a dict lookup rather than a scan
+        self._transitionIndex = [{} for i in range(0, numstates)]
         self._curState = -1
         self._handler = handler
         self._debug = debug
@@ -111,6 +114,9 @@ class StateModel:
                 if not self._transitions[fromState]:
                     self._transitions[fromState] = []
                 self._transitions[fromState].append((event,toState))
+                # The first transition added for an event wins, as with the scan
+                if event not in self._transitionIndex[fromState]:
+                    self._transitionIndex[fromState][event] = toState
             else:
                 raise ValueError(f"Invalid event {event}")
             
@@ -145,16 +151,25 @@ class StateModel:
                     raise ValueError(f"Invalid event {e}")
 
         self._transitions = transitions
+        self._transitionIndex = []
+        for row in transitions:
+            index = {}
+            for (e,s) in row:
+                if e not in index:
+                    index[e] = s
+            self._transitionIndex.append(index)
 
     def getTransition(self, fromState, event):
         """
         Get the distination for this transition
         """
-        if self._transitions[fromState]:
-            for (e,s) in self._transitions[fromState]:
-                if e == event:
-                    return s
-        return -1
+        return self._transitionIndex[fromState].get(event, -1)
+
+    def getState(self):
+        """
+        The current state, or -1 if the model is not running
+        """
+        return self._curState
         
     
     def start(self):
@@ -192,7 +207,7 @@ class StateModel:
         
         if (newState < self._numstates):
             if self._debug:
-                Log.d(f"Going from State {self._curState} to State {newState} on event {event}")
+                Log.d("Going from State %d to State %d on event %s", self._curState, newState, event)
             self._handler.stateLeft(self._curState, event)
             self._curState = newState
             self._handler.stateEntered(self._curState, event)
@@ -214,13 +229,13 @@ class StateModel:
             newstate = self.getTransition(self._curState, event)
             if newstate >= 0:
                 if self._debug:
-                    Log.d(f"Processing event {event}")
+                    Log.d("Processing event %s", event)
                 self.gotoState(newstate, event)
             else:
                 if self._debug:
                     if event != "no_event":
                         if not self._handler.stateEvent(self._curState, event):
-                            Log.d(f"Ignoring event {event}")                    
+                            Log.d("Ignoring event %s", event)
         else:
             raise ValueError(f"Invalid event {event}")
 
@@ -9,7 +9,7 @@ import time
 def main():
     Log.i("Starting APEX connectivity test...")
 
-    net = Net()
+    net = Net.default()
     dal = DAL(net)
 
     # Connect to Wi-Fi
@@ -17,20 +17,16 @@ def main():
     net.connect(WIFI_SSID, WIFI_PASSWORD)
     Log.i("WiFi connected!")
 
-    # Optional: test GET endpoints
+    # Optional: test GET endpoints - both requests go out together
+    # over the one connection, so they share a single round trip
+    garages = levels = None
     try:
-        Log.i("Testing GET /garages ...")
-        garages = dal.get_garages()
+        Log.i("Testing GET /garages + /levels ...")
+        garages, levels = dal.get_garages_and_levels()
         Log.i(f"Garages JSON: {garages}")
-    except Exception as e:
-        Log.e(f"Error retrieving garages: {e}")
-
-    try:
-        Log.i("Testing GET /levels ...")
-        levels = dal.get_levels()
         Log.i(f"Levels JSON: {levels}")
     except Exception as e:
-        Log.e(f"Error retrieving levels: {e}")
+        Log.e(f"Error retrieving garages/levels: {e}")
 
     # Determine database level_id for Garage A Level 1
     level1_id = None
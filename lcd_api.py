@@ -135,7 +135,9 @@ class LcdApi:
         """Writes the indicated character to the LCD at the current cursor
         position, and advances the cursor by one position.
         """
-        if char == '\n':
+        # Iterating bytes / bytearray yields character codes already
+        code = char if isinstance(char, int) else ord(char)
+        if code == 0x0a:    # '\n'
             if self.implied_newline:
                 # self.implied_newline means we advanced due to a wraparound,
                 # so if we get a newline right after that we ignore it.
@@ -143,12 +145,12 @@ class LcdApi:
             else:
                 self.cursor_x = self.num_columns
         else:
-            self.hal_write_data(ord(char))
+            self.hal_write_data(code)
             self.cursor_x += 1
         if self.cursor_x >= self.num_columns:
             self.cursor_x = 0
             self.cursor_y += 1
-            self.implied_newline = (char != '\n')
+            self.implied_newline = (code != 0x0a)
         if self.cursor_y >= self.num_lines:
             self.cursor_y = 0
         self.move_to(self.cursor_x, self.cursor_y)
@@ -156,6 +158,7 @@ class LcdApi:
     def putstr(self, string):
         """Write the indicated string to the LCD at the current cursor
         position and advances the cursor position appropriately.
+        A bytes or bytearray buffer may be given instead of a string.
         """
         for char in string:
             self.putchar(char)
@@ -1,10 +1,13 @@
-from LightStrip import *
+from LightStrip import LightStrip
+from Lights import GREEN, YELLOW, RED
 
 class FeedbackStats:
     def __init__(self):
         self._positive = 0
         self._negative = 0
         self._lightstrip = LightStrip(pin=17, numleds=8)
+        # (color, numleds) last pushed to the strip
+        self._last = (None, None)
 
     def getPercentage(self):
         total = self._positive + self._negative
@@ -15,13 +18,20 @@ class FeedbackStats:
         return v
 
     def showStats(self):
-        numleds = int(8 * self.getPercentage())
-        if numleds > 5:
-            self._lightstrip.setColor(GREEN, numleds)
-        elif numleds > 3:
-            self._lightstrip.setColor(YELLOW, numleds)
+        # Same buckets as 8 * getPercentage(), in integer math
+        total = self._positive + self._negative
+        if total == 0:
+            numleds = 4
         else:
-            self._lightstrip.setColor(RED, numleds)
+            numleds = (8 * self._positive) // total
+        color = GREEN if numleds > 5 else YELLOW if numleds > 3 else RED
+
+        # Only refresh the strip when the band actually changes
+        new = (color, numleds)
+        if new == self._last:
+            return
+        self._last = new
+        self._lightstrip.setColor(color, numleds)
 
     def happy(self):
         self._positive = self._positive + 1